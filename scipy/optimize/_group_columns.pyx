@@ -1,6 +1,10 @@
 """
 Cython implementation of columns grouping for finite difference Jacobian
 estimation. Used by ._numdiff.group_columns.
+
+Row sets are packed into uint64 bitsets, so the "do these columns share a
+nonzero row" check of the greedy Curtis-Powell-Reid algorithm becomes a
+sequence of 64-wide bitwise ANDs instead of per-row comparisons.
 """
 
 from __future__ import absolute_import
@@ -15,16 +19,17 @@ from cpython cimport bool
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
-def group_dense(int m, int n, int [:, :] A):
-    cdef int [:, :] B = A.T  # Transposed view for convenience.
+cdef np.int32_t[:] _group_bitset(int m, int n, np.uint64_t[:, :] col_masks):
+    """Greedily assign groups given per-column row bitsets."""
+    cdef int n_words = col_masks.shape[1]
 
-    cdef int [:] groups = np.full(n, -1, dtype=np.int32)
-    cdef int current_group = 0
+    cdef np.int32_t[:] groups = np.full(n, -1, dtype=np.int32)
+    cdef np.int32_t current_group = 0
 
-    cdef int i, j, k
+    cdef int i, j, w
 
-    union = np.empty(m, dtype=np.int32)
-    cdef int [:] union_v = union
+    union = np.empty(n_words, dtype=np.uint64)
+    cdef np.uint64_t[:] union_v = union
 
     # Loop through all the columns.
     for i in range(n):
@@ -34,9 +39,9 @@ def group_dense(int m, int n, int [:, :] A):
         groups[i] = current_group
         all_grouped = True
 
-        union_v[:] = B[i]  # Here we store the union of grouped columns.
+        union_v[:] = col_masks[i]  # Here we store the union of grouped columns.
 
-        for j in range(groups.shape[0]):
+        for j in range(n):
             if groups[j] < 0:
                 all_grouped = False
             else:
@@ -44,14 +49,15 @@ def group_dense(int m, int n, int [:, :] A):
 
             # Determine if j-th column intersects with the union.
             intersect = False
-            for k in range(m):
-                if union_v[k] > 0 and B[j, k] > 0:
+            for w in range(n_words):
+                if union_v[w] & col_masks[j, w]:
                     intersect = True
                     break
 
             # If not, add it to the union and assign the group to it.
             if not intersect:
-                union += B[j]
+                for w in range(n_words):
+                    union_v[w] |= col_masks[j, w]
                 groups[j] = current_group
 
         if all_grouped:
@@ -59,49 +65,36 @@ def group_dense(int m, int n, int [:, :] A):
 
         current_group += 1
 
-    return groups.base
+    return groups
 
 
+@cython.boundscheck(False)
 @cython.wraparound(False)
-def group_sparse(int m, int n, int [:] indices, int [:] indptr):
-    cdef int [:] groups = np.full(n, -1, dtype=np.int32)
-    cdef int current_group = 0
-
-    cdef int i, j, k
+def group_dense(int m, int n, int [:, :] A):
+    cdef int n_words = (m + 63) // 64
 
-    union = np.empty(m, dtype=np.int32)
-    cdef int [:] union_v = union
+    cdef np.uint64_t[:, :] col_masks = np.zeros((n, n_words), dtype=np.uint64)
+    cdef int i, k
 
     for i in range(n):
-        if groups[i] >= 0:
-            continue
+        for k in range(m):
+            if A[k, i] != 0:
+                col_masks[i, k >> 6] |= (<np.uint64_t>1) << (k & 63)
 
-        groups[i] = current_group
-        all_grouped = True
-
-        union.fill(0)
-        for k in range(indptr[i], indptr[i + 1]):
-            union_v[indices[k]] = 1
+    return np.asarray(_group_bitset(m, n, col_masks))
 
-        for j in range(groups.shape[0]):
-            if groups[j] < 0:
-                all_grouped = False
-            else:
-                continue
 
-            intersect = False
-            for k in range(indptr[j], indptr[j + 1]):
-                if union_v[indices[k]] == 1:
-                    intersect = True
-                    break
-            if not intersect:
-                for k in range(indptr[j], indptr[j + 1]):
-                    union_v[indices[k]] = 1
-                groups[j] = current_group
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def group_sparse(int m, int n, int [:] indices, int [:] indptr):
+    cdef int n_words = (m + 63) // 64
 
-        if all_grouped:
-            break
+    cdef np.uint64_t[:, :] col_masks = np.zeros((n, n_words), dtype=np.uint64)
+    cdef int i, k, row
 
-        current_group += 1
+    for i in range(n):
+        for k in range(indptr[i], indptr[i + 1]):
+            row = indices[k]
+            col_masks[i, row >> 6] |= (<np.uint64_t>1) << (row & 63)
 
-    return groups.base
+    return np.asarray(_group_bitset(m, n, col_masks))
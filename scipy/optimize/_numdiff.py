@@ -2,17 +2,20 @@
 
 from __future__ import division
 
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 from numpy.linalg import norm
 
 from scipy.sparse.linalg import LinearOperator
-from ..sparse import issparse, csc_matrix, csr_matrix, coo_matrix, find
+from ..sparse import issparse, csc_matrix, csr_matrix, find
 from ._group_columns import group_dense, group_sparse
 
 EPS = np.finfo(np.float64).eps
 
 
-def _adjust_scheme_to_bounds(x0, h, num_steps, scheme, lb, ub):
+def _adjust_scheme_to_bounds(x0, h, num_steps, scheme, lb, ub,
+                             unbounded=False):
     """Adjust final difference scheme to the presence of bounds.
 
     Parameters
@@ -33,6 +36,10 @@ def _adjust_scheme_to_bounds(x0, h, num_steps, scheme, lb, ub):
         Lower bounds on independent variables.
     ub : ndarray, shape (n,)
         Upper bounds on independent variables.
+    unbounded : bool, optional
+        If True, `lb` and `ub` are known to be -inf and inf everywhere
+        (e.g. detected by `_prepare_bounds` from scalar inputs) and the
+        adjustment is skipped without scanning the bound arrays.
 
     Returns
     -------
@@ -51,42 +58,43 @@ def _adjust_scheme_to_bounds(x0, h, num_steps, scheme, lb, ub):
     else:
         raise ValueError("`scheme` must be '1-sided' or '2-sided'.")
 
-    if np.all((lb == -np.inf) & (ub == np.inf)):
+    if unbounded or np.all((lb == -np.inf) & (ub == np.inf)):
         return h, use_one_sided
 
     h_total = h * num_steps
-    h_adjusted = h.copy()
 
     lower_dist = x0 - lb
     upper_dist = ub - x0
 
     if scheme == '1-sided':
+        # As in the 2-sided branch, one nested np.where selection replaces
+        # a chain of masked assignments and their boolean temporaries.
         x = x0 + h_total
         violated = (x < lb) | (x > ub)
         fitting = np.abs(h_total) <= np.maximum(lower_dist, upper_dist)
-        h_adjusted[violated & fitting] *= -1
-
-        forward = (upper_dist >= lower_dist) & ~fitting
-        h_adjusted[forward] = upper_dist[forward] / num_steps
-        backward = (upper_dist < lower_dist) & ~fitting
-        h_adjusted[backward] = -lower_dist[backward] / num_steps
+        h_adjusted = np.where(
+            fitting,
+            np.where(violated, -h, h),
+            np.where(upper_dist >= lower_dist,
+                     upper_dist / num_steps,
+                     -lower_dist / num_steps))
     elif scheme == '2-sided':
+        # Fuse the forward/backward/adjusted-central logic into nested
+        # np.where calls instead of a sequence of masked assignments, each
+        # of which allocated its own boolean temporary.
         central = (lower_dist >= h_total) & (upper_dist >= h_total)
 
-        forward = (upper_dist >= lower_dist) & ~central
-        h_adjusted[forward] = np.minimum(
-            h[forward], 0.5 * upper_dist[forward] / num_steps)
-        use_one_sided[forward] = True
-
-        backward = (upper_dist < lower_dist) & ~central
-        h_adjusted[backward] = -np.minimum(
-            h[backward], 0.5 * lower_dist[backward] / num_steps)
-        use_one_sided[backward] = True
+        h_one_sided = np.where(
+            upper_dist >= lower_dist,
+            np.minimum(h, 0.5 * upper_dist / num_steps),
+            -np.minimum(h, 0.5 * lower_dist / num_steps))
 
         min_dist = np.minimum(upper_dist, lower_dist) / num_steps
-        adjusted_central = (~central & (np.abs(h_adjusted) <= min_dist))
-        h_adjusted[adjusted_central] = min_dist[adjusted_central]
-        use_one_sided[adjusted_central] = False
+        keep_central = np.abs(h_one_sided) <= min_dist
+
+        h_adjusted = np.where(
+            central, h, np.where(keep_central, min_dist, h_one_sided))
+        use_one_sided = ~central & ~keep_central
 
     return h_adjusted, use_one_sided
 
@@ -99,19 +107,26 @@ relative_step = {"2-point": EPS**0.5,
 def _compute_absolute_step(rel_step, x0, method):
     if rel_step is None:
         rel_step = relative_step[method]
-    sign_x0 = (x0 >= 0).astype(float) * 2 - 1
-    return rel_step * sign_x0 * np.maximum(1.0, np.abs(x0))
+    # copysign sets the sign bit directly, avoiding the boolean-to-float
+    # cast and extra passes of ``(x0 >= 0) * 2 - 1``.
+    return rel_step * np.copysign(np.maximum(1.0, np.abs(x0)), x0)
 
 
 def _prepare_bounds(bounds, x0):
     lb, ub = [np.asarray(b, dtype=float) for b in bounds]
+
+    # Detect the common unbounded case from the scalar inputs, so that
+    # callers can skip bound adjustments without scanning full arrays.
+    unbounded = (lb.ndim == 0 and lb == -np.inf and
+                 ub.ndim == 0 and ub == np.inf)
+
     if lb.ndim == 0:
         lb = np.resize(lb, x0.shape)
 
     if ub.ndim == 0:
         ub = np.resize(ub, x0.shape)
 
-    return lb, ub
+    return lb, ub, unbounded
 
 
 def group_columns(A, order=0):
@@ -124,11 +139,12 @@ def group_columns(A, order=0):
     ----------
     A : array_like or sparse matrix, shape (m, n)
         Matrix of which to group columns.
-    order : int, iterable of int with shape (n,) or None
+    order : int, iterable of int with shape (n,), Generator or None
         Permutation array which defines the order of columns enumeration.
         If int or None, a random permutation is used with `order` used as
         a random seed. Default is 0, that is use a random permutation but
-        guarantee repeatability.
+        guarantee repeatability. A `numpy.random.Generator` may also be
+        passed to draw the permutation without touching global state.
 
     Returns
     -------
@@ -144,8 +160,10 @@ def group_columns(A, order=0):
            sparse Jacobian matrices", Journal of the Institute of Mathematics
            and its Applications, 13 (1974), pp. 117-120.
     """
-    if issparse(A):
-        A = csc_matrix(A)
+    is_sparse = issparse(A)
+    if is_sparse:
+        if not isinstance(A, csc_matrix):
+            A = csc_matrix(A)
     else:
         A = np.atleast_2d(A)
         A = (A != 0).astype(np.int32)
@@ -155,9 +173,18 @@ def group_columns(A, order=0):
 
     m, n = A.shape
 
+    # np.random.default_rng is only available on numpy >= 1.17, newer
+    # than our minimum supported version; fall back to RandomState on
+    # older numpy.
+    has_default_rng = hasattr(np.random, 'default_rng')
+
     if order is None or np.isscalar(order):
-        rng = np.random.RandomState(order)
-        order = rng.permutation(n)
+        if has_default_rng:
+            order = np.random.default_rng(order).permutation(n)
+        else:
+            order = np.random.RandomState(order).permutation(n)
+    elif has_default_rng and isinstance(order, np.random.Generator):
+        order = order.permutation(n)
     else:
         order = np.asarray(order)
         if order.shape != (n,):
@@ -165,19 +192,23 @@ def group_columns(A, order=0):
 
     A = A[:, order]
 
-    if issparse(A):
+    if is_sparse:
         groups = group_sparse(m, n, A.indices, A.indptr)
     else:
         groups = group_dense(m, n, A)
 
-    groups[order] = groups.copy()
+    # Undo the column permutation without copying `groups`.
+    inv_order = np.empty_like(order)
+    inv_order[order] = np.arange(order.size)
+    groups = groups[inv_order]
 
     return groups
 
 
 def approx_derivative(fun, x0, method='3-point', rel_step=None, f0=None,
                       bounds=(-np.inf, np.inf), sparsity=None,
-                      as_linear_operator=False, args=(), kwargs={}):
+                      as_linear_operator=False, vectorized=False,
+                      workers=None, args=(), kwargs={}):
     """Compute finite difference approximation of the derivatives of a
     vector-valued function.
 
@@ -247,6 +278,23 @@ def approx_derivative(fun, x0, method='3-point', rel_step=None, f0=None,
         ``J.dot(p)`` for any vector ``p`` of shape (n,), but does not allow
         direct access to individual elements of the matrix. By default
         `as_linear_operator` is False.
+    vectorized : bool, optional
+        If True, `fun` is assumed to accept a 2-d array of shape (k, n),
+        where each row is a point at which to evaluate the function, and
+        to return an array of shape (k, m) (or (k,) when m=1) with the
+        corresponding function values. All perturbed points required by the
+        finite difference scheme are then evaluated in a single call to
+        `fun` instead of a Python loop, which amortizes any per-call
+        overhead in `fun`. Not compatible with `sparsity` or
+        `as_linear_operator`. Default is False.
+    workers : int or None, optional
+        If given and greater than 1, evaluate the perturbed points of the
+        dense differencing scheme in `workers` threads; -1 uses as many
+        threads as there are CPUs. The evaluations are independent, so
+        `fun` must be reentrant, and speedups require `fun` to release
+        the GIL (e.g. compiled code). Not compatible with `sparsity`,
+        `vectorized` or `as_linear_operator`. Default is None, meaning
+        serial evaluation.
     args, kwargs : tuple and dict, optional
         Additional arguments passed to `fun`. Both empty by default.
         The calling signature is ``fun(x, *args, **kwargs)``.
@@ -330,74 +378,178 @@ def approx_derivative(fun, x0, method='3-point', rel_step=None, f0=None,
     if method not in ['2-point', '3-point', 'cs']:
         raise ValueError("Unknown method '%s'. " % method)
 
-    x0 = np.atleast_1d(x0)
-    if x0.ndim > 1:
-        raise ValueError("`x0` must have at most 1 dimension.")
+    if as_linear_operator:
+        if vectorized or (workers is not None and workers != 1):
+            raise ValueError("`vectorized` and `workers` are not supported "
+                             "when `as_linear_operator` is True.")
 
-    lb, ub = _prepare_bounds(bounds, x0)
+        x0 = np.atleast_1d(x0)
+        if x0.ndim > 1:
+            raise ValueError("`x0` must have at most 1 dimension.")
 
-    if lb.shape != x0.shape or ub.shape != x0.shape:
-        raise ValueError("Inconsistent shapes between bounds and `x0`.")
+        lb, ub, unbounded = _prepare_bounds(bounds, x0)
 
-    if as_linear_operator and not (np.all(np.isinf(lb))
-                                   and np.all(np.isinf(ub))):
-        raise ValueError("Bounds not supported when "
-                         "`as_linear_operator` is True.")
+        if lb.shape != x0.shape or ub.shape != x0.shape:
+            raise ValueError("Inconsistent shapes between bounds and `x0`.")
 
-    def fun_wrapped(x):
-        f = np.atleast_1d(fun(x, *args, **kwargs))
-        if f.ndim > 1:
-            raise RuntimeError("`fun` return value has "
-                               "more than 1 dimension.")
-        return f
+        if not (np.all(np.isinf(lb)) and np.all(np.isinf(ub))):
+            raise ValueError("Bounds not supported when "
+                             "`as_linear_operator` is True.")
 
-    if f0 is None:
-        f0 = fun_wrapped(x0)
-    else:
-        f0 = np.atleast_1d(f0)
-        if f0.ndim > 1:
-            raise ValueError("`f0` passed has more than 1 dimension.")
+        def fun_wrapped(x):
+            f = np.atleast_1d(fun(x, *args, **kwargs))
+            if f.ndim > 1:
+                raise RuntimeError("`fun` return value has "
+                                   "more than 1 dimension.")
+            return f
 
-    if np.any((x0 < lb) | (x0 > ub)):
-        raise ValueError("`x0` violates bound constraints.")
+        if f0 is None:
+            f0 = fun_wrapped(x0)
+        else:
+            f0 = np.atleast_1d(f0)
+            if f0.ndim > 1:
+                raise ValueError("`f0` passed has more than 1 dimension.")
 
-    if as_linear_operator:
         if rel_step is None:
             rel_step = relative_step[method]
 
         return _linear_operator_difference(fun_wrapped, x0,
                                            f0, rel_step, method)
-    else:
-        h = _compute_absolute_step(rel_step, x0, method)
 
-        if method == '2-point':
-            h, use_one_sided = _adjust_scheme_to_bounds(
-                x0, h, 1, '1-sided', lb, ub)
-        elif method == '3-point':
-            h, use_one_sided = _adjust_scheme_to_bounds(
-                x0, h, 1, '2-sided', lb, ub)
-        elif method == 'cs':
-            use_one_sided = False
+    estimator = _ApproxDerivative(fun, method=method, rel_step=rel_step,
+                                  bounds=bounds, sparsity=sparsity,
+                                  vectorized=vectorized, workers=workers,
+                                  args=args, kwargs=kwargs)
+    return estimator(x0, f0=f0)
 
-        if sparsity is None:
-            return _dense_difference(fun_wrapped, x0, f0, h,
-                                     use_one_sided, method)
+
+class _ApproxDerivative(object):
+    """Reusable finite difference Jacobian estimator.
+
+    Callers which estimate the Jacobian of the same function repeatedly,
+    e.g. on every iteration of a nonlinear solver, can instantiate this
+    class once and call the instance at successive points. Everything
+    that does not depend on the evaluation point -- bound preprocessing,
+    column grouping and the per-group sparsity bookkeeping -- is then
+    computed a single time instead of on every call.
+
+    Parameters are as for `approx_derivative`, except that `x0` and `f0`
+    are supplied per call and `as_linear_operator` is not supported. All
+    calls must use the same size of `x0`.
+    """
+
+    def __init__(self, fun, method='3-point', rel_step=None,
+                 bounds=(-np.inf, np.inf), sparsity=None, vectorized=False,
+                 workers=None, args=(), kwargs={}):
+        if method not in ['2-point', '3-point', 'cs']:
+            raise ValueError("Unknown method '%s'. " % method)
+
+        if vectorized and sparsity is not None:
+            raise ValueError("`vectorized` is not supported with `sparsity` "
+                             "or `as_linear_operator`.")
+
+        if workers is not None and (workers == 0 or workers < -1):
+            raise ValueError("`workers` must be a positive integer or -1.")
+
+        if workers is not None and workers != 1 and (
+                sparsity is not None or vectorized):
+            raise ValueError("`workers` is not supported with `sparsity`, "
+                             "`vectorized` or `as_linear_operator`.")
+
+        self.method = method
+        self.rel_step = rel_step
+        self.bounds = bounds
+        self.vectorized = vectorized
+        self.workers = workers
+
+        if vectorized:
+            def fun_wrapped(X):
+                F = np.asarray(fun(X, *args, **kwargs))
+                if F.ndim == 1:
+                    F = F.reshape(X.shape[0], -1)
+                if F.ndim != 2 or F.shape[0] != X.shape[0]:
+                    raise RuntimeError("Vectorized `fun` must return an "
+                                       "array with one row per evaluation "
+                                       "point.")
+                return F
         else:
+            def fun_wrapped(x):
+                f = np.atleast_1d(fun(x, *args, **kwargs))
+                if f.ndim > 1:
+                    raise RuntimeError("`fun` return value has "
+                                       "more than 1 dimension.")
+                return f
+
+        self.fun_wrapped = fun_wrapped
+
+        if sparsity is not None:
             if not issparse(sparsity) and len(sparsity) == 2:
                 structure, groups = sparsity
             else:
                 structure = sparsity
                 groups = group_columns(sparsity)
-
-            if issparse(structure):
-                structure = csc_matrix(structure)
+            self.group_data = _sparse_group_indices(csc_matrix(structure),
+                                                    np.atleast_1d(groups))
+        else:
+            self.group_data = None
+
+        # Bounds are broadcast on the first call, when the shape of x0
+        # is known.
+        self._lb = None
+        self._ub = None
+        self._unbounded = None
+
+    def __call__(self, x0, f0=None):
+        # Promote to float64 up front: the scratch buffers below inherit
+        # this dtype, and integer or float32 x0 would otherwise truncate
+        # the perturbation steps.
+        x0 = np.atleast_1d(np.asarray(x0, dtype=float))
+        if x0.ndim > 1:
+            raise ValueError("`x0` must have at most 1 dimension.")
+
+        if self._lb is None:
+            self._lb, self._ub, self._unbounded = _prepare_bounds(
+                self.bounds, x0)
+        lb = self._lb
+        ub = self._ub
+
+        if lb.shape != x0.shape or ub.shape != x0.shape:
+            raise ValueError("Inconsistent shapes between bounds and `x0`.")
+
+        if f0 is None:
+            if self.vectorized:
+                f0 = self.fun_wrapped(x0[None, :])[0]
             else:
-                structure = np.atleast_2d(structure)
+                f0 = self.fun_wrapped(x0)
+        else:
+            f0 = np.atleast_1d(f0)
+            if f0.ndim > 1:
+                raise ValueError("`f0` passed has more than 1 dimension.")
+
+        if np.any((x0 < lb) | (x0 > ub)):
+            raise ValueError("`x0` violates bound constraints.")
 
-            groups = np.atleast_1d(groups)
-            return _sparse_difference(fun_wrapped, x0, f0, h,
-                                      use_one_sided, structure,
-                                      groups, method)
+        method = self.method
+        h = _compute_absolute_step(self.rel_step, x0, method)
+
+        if method == '2-point':
+            h, use_one_sided = _adjust_scheme_to_bounds(
+                x0, h, 1, '1-sided', lb, ub, unbounded=self._unbounded)
+        elif method == '3-point':
+            h, use_one_sided = _adjust_scheme_to_bounds(
+                x0, h, 1, '2-sided', lb, ub, unbounded=self._unbounded)
+        elif method == 'cs':
+            use_one_sided = False
+
+        if self.group_data is None:
+            return _dense_difference(self.fun_wrapped, x0, f0, h,
+                                     use_one_sided, method,
+                                     vectorized=self.vectorized,
+                                     workers=self.workers)
+        else:
+            return _sparse_difference(self.fun_wrapped, x0, f0, h,
+                                      use_one_sided, self.group_data,
+                                      method)
 
 
 def _linear_operator_difference(fun, x0, f0, h, method):
@@ -441,39 +593,118 @@ def _linear_operator_difference(fun, x0, f0, h, method):
     return LinearOperator((m, n), matvec)
 
 
-def _dense_difference(fun, x0, f0, h, use_one_sided, method):
+def _dense_difference_vectorized(fun, x0, f0, h, use_one_sided, method):
+    # Stack perturbed points into matrices with one point per row and
+    # evaluate `fun` on each matrix in batched calls.
     m = f0.size
     n = x0.size
     J_transposed = np.empty((n, m))
-    h_vecs = np.diag(h)
 
-    for i in range(h.size):
+    # Process perturbations in blocks sized so that a block of stacked
+    # points, its function values and the output slice fit together in a
+    # typical L2 cache (~256 KiB of doubles).
+    block_size = max(1, 262144 // (8 * (n + m)))
+
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        blk = slice(start, stop)
+        rows = np.arange(stop - start)
+        cols = np.arange(start, stop)
+
         if method == '2-point':
-            x = x0 + h_vecs[i]
-            dx = x[i] - x0[i]  # Recompute dx as exactly representable number.
-            df = fun(x) - f0
-        elif method == '3-point' and use_one_sided[i]:
-            x1 = x0 + h_vecs[i]
-            x2 = x0 + 2 * h_vecs[i]
-            dx = x2[i] - x0[i]
-            f1 = fun(x1)
-            f2 = fun(x2)
-            df = -3.0 * f0 + 4 * f1 - f2
-        elif method == '3-point' and not use_one_sided[i]:
-            x1 = x0 - h_vecs[i]
-            x2 = x0 + h_vecs[i]
-            dx = x2[i] - x1[i]
-            f1 = fun(x1)
-            f2 = fun(x2)
-            df = f2 - f1
+            X = np.broadcast_to(x0, (stop - start, n)).copy()
+            X[rows, cols] += h[blk]
+            # Recompute dx as exactly representable numbers.
+            dx = X[rows, cols] - x0[blk]
+            J_transposed[blk] = (fun(X) - f0) / dx[:, None]
+        elif method == '3-point':
+            one_sided = use_one_sided[blk]
+            X1 = np.broadcast_to(x0, (stop - start, n)).copy()
+            X2 = X1.copy()
+            X1[rows, cols] += np.where(one_sided, h[blk], -h[blk])
+            X2[rows, cols] += np.where(one_sided, 2 * h[blk], h[blk])
+            dx = X2[rows, cols] - np.where(one_sided, x0[blk],
+                                           X1[rows, cols])
+            f1 = fun(X1)
+            f2 = fun(X2)
+            df = np.where(one_sided[:, None],
+                          -3.0 * f0 + 4 * f1 - f2,
+                          f2 - f1)
+            J_transposed[blk] = df / dx[:, None]
         elif method == 'cs':
-            f1 = fun(x0 + h_vecs[i]*1.j)
-            df = f1.imag
-            dx = h_vecs[i, i]
+            X = np.broadcast_to(x0, (stop - start, n)).astype(complex)
+            X[rows, cols] += h[blk] * 1.j
+            J_transposed[blk] = fun(X).imag / h[blk, None]
         else:
             raise RuntimeError("Never be here.")
 
-        J_transposed[i] = df / dx
+    if m == 1:
+        J_transposed = np.ravel(J_transposed)
+
+    return J_transposed.T
+
+
+def _dense_difference_parallel(fun, x0, f0, h, use_one_sided, method,
+                               workers):
+    # The perturbed evaluations are independent, so pipeline them through
+    # a thread pool. Each point gets its own array since the evaluations
+    # overlap in time. `fun` must be reentrant.
+    m = f0.size
+    n = x0.size
+    J_transposed = np.empty((n, m))
+    dx = np.empty(n)
+    xs = []
+
+    if method == '2-point':
+        for i in range(n):
+            x = x0.copy()
+            x[i] += h[i]
+            dx[i] = x[i] - x0[i]
+            xs.append(x)
+    elif method == '3-point':
+        x2s = []
+        for i in range(n):
+            x1 = x0.copy()
+            x2 = x0.copy()
+            if use_one_sided[i]:
+                x1[i] += h[i]
+                x2[i] += 2 * h[i]
+                dx[i] = x2[i] - x0[i]
+            else:
+                x1[i] -= h[i]
+                x2[i] += h[i]
+                dx[i] = x2[i] - x1[i]
+            xs.append(x1)
+            x2s.append(x2)
+        # Submit both stacks in one map so all evaluations pipeline.
+        xs += x2s
+    elif method == 'cs':
+        for i in range(n):
+            x = x0.astype(complex)
+            x[i] += h[i] * 1.j
+            dx[i] = h[i]
+            xs.append(x)
+    else:
+        raise RuntimeError("Never be here.")
+
+    max_workers = None if workers == -1 else workers
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(fun, xs))
+
+    for i in range(n):
+        if method == '2-point':
+            df = results[i] - f0
+        elif method == '3-point':
+            f1 = results[i]
+            f2 = results[n + i]
+            if use_one_sided[i]:
+                df = -3.0 * f0 + 4 * f1 - f2
+            else:
+                df = f2 - f1
+        else:
+            df = results[i].imag
+
+        J_transposed[i] = df / dx[i]
 
     if m == 1:
         J_transposed = np.ravel(J_transposed)
@@ -481,84 +712,176 @@ def _dense_difference(fun, x0, f0, h, use_one_sided, method):
     return J_transposed.T
 
 
-def _sparse_difference(fun, x0, f0, h, use_one_sided,
-                       structure, groups, method):
+def _dense_difference(fun, x0, f0, h, use_one_sided, method,
+                      vectorized=False, workers=None):
+    if vectorized:
+        return _dense_difference_vectorized(fun, x0, f0, h,
+                                            use_one_sided, method)
+
+    if workers is not None and workers != 1:
+        return _dense_difference_parallel(fun, x0, f0, h,
+                                          use_one_sided, method, workers)
+
+    m = f0.size
+    n = x0.size
+    J_transposed = np.empty((n, m))
+
+    # Reuse scratch buffers across iterations, perturbing and restoring a
+    # single element at a time instead of materializing np.diag(h). The
+    # method and scheme are dispatched once, so every loop body below
+    # contains a single difference formula.
+    if method == '2-point':
+        x1 = x0.copy()
+        for i in range(n):
+            x1[i] = x0[i] + h[i]
+            dx = x1[i] - x0[i]  # Recompute dx as exactly representable number.
+            J_transposed[i] = (fun(x1) - f0) / dx
+            x1[i] = x0[i]
+    elif method == '3-point':
+        x1 = x0.copy()
+        x2 = x0.copy()
+        for i in np.nonzero(~use_one_sided)[0]:
+            x1[i] = x0[i] - h[i]
+            x2[i] = x0[i] + h[i]
+            dx = x2[i] - x1[i]
+            f1 = fun(x1)
+            f2 = fun(x2)
+            J_transposed[i] = (f2 - f1) / dx
+            x1[i] = x0[i]
+            x2[i] = x0[i]
+        for i in np.nonzero(use_one_sided)[0]:
+            x1[i] = x0[i] + h[i]
+            x2[i] = x0[i] + 2 * h[i]
+            dx = x2[i] - x0[i]
+            f1 = fun(x1)
+            f2 = fun(x2)
+            J_transposed[i] = (-3.0 * f0 + 4 * f1 - f2) / dx
+            x1[i] = x0[i]
+            x2[i] = x0[i]
+    elif method == 'cs':
+        x1 = x0.astype(complex)
+        for i in range(n):
+            x1[i] = x0[i] + h[i] * 1.j
+            J_transposed[i] = fun(x1).imag / h[i]
+            x1[i] = x0[i]
+    else:
+        raise RuntimeError("Never be here.")
+
+    if m == 1:
+        J_transposed = np.ravel(J_transposed)
+
+    return J_transposed.T
+
+
+def _sparse_group_indices(structure, groups):
+    """Precompute the sparsity bookkeeping of each column group.
+
+    For every group this returns a tuple ``(cols, i, j)`` with the columns
+    belonging to the group and the row and column indices of all non-zero
+    elements of `structure` in those columns. Working with the raw CSC
+    arrays -- the nonzero rows of column c are
+    ``indices[indptr[c]:indptr[c + 1]]`` -- avoids slicing the structure
+    matrix and calling `find` on every group. The positions of the
+    gathered entries within `indices` are the concatenated ranges
+    [indptr[c], indptr[c + 1]) for c in cols, built without a Python loop
+    over the columns.
+    """
+    indices = structure.indices
+    indptr = structure.indptr
+    n_groups = np.max(groups) + 1
+
+    group_data = []
+    for group in range(n_groups):
+        cols = np.nonzero(np.equal(group, groups))[0]
+        counts = indptr[cols + 1] - indptr[cols]
+        pos = np.arange(counts.sum()) + np.repeat(
+            indptr[cols] - (np.cumsum(counts) - counts), counts)
+        group_data.append((cols, indices[pos], np.repeat(cols, counts)))
+
+    return group_data
+
+
+def _sparse_difference(fun, x0, f0, h, use_one_sided, group_data, method):
     m = f0.size
     n = x0.size
     row_indices = []
     col_indices = []
     fractions = []
 
-    n_groups = np.max(groups) + 1
-    for group in range(n_groups):
-        # Perturb variables which are in the same group simultaneously.
-        e = np.equal(group, groups)
-        h_vec = h * e
+    # Scratch buffers reused across groups: only elements at this group's
+    # columns are perturbed and then restored, so no per-group boolean
+    # masks or fresh copies of x0 are needed.
+    if method == 'cs':
+        x1 = x0.astype(complex)
+    else:
+        x1 = x0.copy()
+    if method == '3-point':
+        x2 = x0.copy()
+        # Split each group's columns by the scheme used for them.
+        cols_one_sided = [cols[use_one_sided[cols]]
+                          for cols, _, _ in group_data]
+        cols_two_sided = [cols[~use_one_sided[cols]]
+                          for cols, _, _ in group_data]
+    dx = np.empty(n)
+
+    for group, (cols, i, j) in enumerate(group_data):
         if method == '2-point':
-            x = x0 + h_vec
-            dx = x - x0
-            df = fun(x) - f0
-            # The result is  written to columns which correspond to perturbed
-            # variables.
-            cols, = np.nonzero(e)
-            # Find all non-zero elements in selected columns of Jacobian.
-            i, j, _ = find(structure[:, cols])
-            # Restore column indices in the full array.
-            j = cols[j]
+            x1[cols] += h[cols]
+            dx[cols] = x1[cols] - x0[cols]
+            f = fun(x1)
+            x1[cols] = x0[cols]
+            # Difference only the touched rows instead of building a full
+            # m-length df array.
+            fracs = (f[i] - f0[i]) / dx[j]
         elif method == '3-point':
             # Here we do conceptually the same but separate one-sided
             # and two-sided schemes.
-            x1 = x0.copy()
-            x2 = x0.copy()
+            idx1 = cols_one_sided[group]
+            idx2 = cols_two_sided[group]
 
-            mask_1 = use_one_sided & e
-            x1[mask_1] += h_vec[mask_1]
-            x2[mask_1] += 2 * h_vec[mask_1]
+            x1[idx1] += h[idx1]
+            x2[idx1] += 2 * h[idx1]
 
-            mask_2 = ~use_one_sided & e
-            x1[mask_2] -= h_vec[mask_2]
-            x2[mask_2] += h_vec[mask_2]
+            x1[idx2] -= h[idx2]
+            x2[idx2] += h[idx2]
 
-            dx = np.zeros(n)
-            dx[mask_1] = x2[mask_1] - x0[mask_1]
-            dx[mask_2] = x2[mask_2] - x1[mask_2]
+            dx[idx1] = x2[idx1] - x0[idx1]
+            dx[idx2] = x2[idx2] - x1[idx2]
 
             f1 = fun(x1)
             f2 = fun(x2)
 
-            cols, = np.nonzero(e)
-            i, j, _ = find(structure[:, cols])
-            j = cols[j]
-
-            mask = use_one_sided[j]
-            df = np.empty(m)
-
-            rows = i[mask]
-            df[rows] = -3 * f0[rows] + 4 * f1[rows] - f2[rows]
+            x1[cols] = x0[cols]
+            x2[cols] = x0[cols]
 
-            rows = i[~mask]
-            df[rows] = f2[rows] - f1[rows]
+            # Combine the one-sided and central formulas in a single pass
+            # over the gathered rows, without an m-length scratch array.
+            fracs = np.where(use_one_sided[j],
+                             -3 * f0[i] + 4 * f1[i] - f2[i],
+                             f2[i] - f1[i]) / dx[j]
         elif method == 'cs':
-            f1 = fun(x0 + h_vec*1.j)
-            df = f1.imag
-            dx = h_vec
-            cols, = np.nonzero(e)
-            i, j, _ = find(structure[:, cols])
-            j = cols[j]
+            x1[cols] += h[cols] * 1.j
+            f = fun(x1)
+            dx[cols] = h[cols]
+            x1[cols] = x0[cols]
+            # .imag is a view, so only the touched rows are materialized.
+            fracs = f.imag[i] / dx[j]
         else:
             raise ValueError("Never be here.")
 
-        # All that's left is to compute the fraction. We store i, j and
-        # fractions as separate arrays and later construct coo_matrix.
+        # We store i, j and the fractions as separate arrays and construct
+        # the result in one shot.
         row_indices.append(i)
         col_indices.append(j)
-        fractions.append(df[i] / dx[j])
+        fractions.append(fracs)
 
-    row_indices = np.hstack(row_indices)
-    col_indices = np.hstack(col_indices)
-    fractions = np.hstack(fractions)
-    J = coo_matrix((fractions, (row_indices, col_indices)), shape=(m, n))
-    return csr_matrix(J)
+    # Each column belongs to exactly one group, so no duplicate
+    # coordinates can occur and the CSR matrix is built directly from
+    # the concatenated triplets.
+    row_indices = np.concatenate(row_indices)
+    col_indices = np.concatenate(col_indices)
+    fractions = np.concatenate(fractions)
+    return csr_matrix((fractions, (row_indices, col_indices)), shape=(m, n))
 
 
 def check_derivative(fun, jac, x0, bounds=(-np.inf, np.inf), args=(),
@@ -624,9 +947,12 @@ def check_derivative(fun, jac, x0, bounds=(-np.inf, np.inf), args=(),
     """
     J_to_test = jac(x0, *args, **kwargs)
     if issparse(J_to_test):
+        # Convert to CSR once; the same matrix serves as the sparsity
+        # pattern of the finite difference approximation and as the
+        # comparison operand, so no dense reconstruction is ever needed.
+        J_to_test = csr_matrix(J_to_test)
         J_diff = approx_derivative(fun, x0, bounds=bounds, sparsity=J_to_test,
                                    args=args, kwargs=kwargs)
-        J_to_test = csr_matrix(J_to_test)
         abs_err = J_to_test - J_diff
         i, j, abs_err_data = find(abs_err)
         J_diff_data = np.asarray(J_diff[i, j]).ravel()
@@ -10,8 +10,8 @@ from pytest import raises as assert_raises
 from scipy.sparse import csr_matrix, csc_matrix, lil_matrix
 
 from scipy.optimize._numdiff import (
-    _adjust_scheme_to_bounds, approx_derivative, check_derivative,
-    group_columns)
+    _adjust_scheme_to_bounds, _ApproxDerivative, approx_derivative,
+    check_derivative, group_columns)
 
 
 def test_group_columns():
@@ -235,6 +235,96 @@ class TestApproxDerivativesDense(object):
         assert_allclose(jac_diff_3, jac_true, rtol=1e-6)
         assert_allclose(jac_diff_4, jac_true, rtol=1e-12)
 
+    def fun_vector_vector_batch(self, X):
+        return np.stack([
+            X[:, 0] * np.sin(X[:, 1]),
+            X[:, 1] * np.cos(X[:, 0]),
+            X[:, 0] ** 3 * X[:, 1] ** -0.5
+        ], axis=1)
+
+    def fun_vector_scalar_batch(self, X):
+        return np.sin(X[:, 0] * X[:, 1]) * np.log(X[:, 0])
+
+    def test_vectorized(self):
+        x0 = np.array([-100.0, 0.2])
+        jac_true = self.jac_vector_vector(x0)
+        jac_diff_2 = approx_derivative(self.fun_vector_vector_batch, x0,
+                                       method='2-point', vectorized=True)
+        jac_diff_3 = approx_derivative(self.fun_vector_vector_batch, x0,
+                                       vectorized=True)
+        jac_diff_4 = approx_derivative(self.fun_vector_vector_batch, x0,
+                                       method='cs', vectorized=True)
+        assert_allclose(jac_diff_2, jac_true, rtol=1e-5)
+        assert_allclose(jac_diff_3, jac_true, rtol=1e-6)
+        assert_allclose(jac_diff_4, jac_true, rtol=1e-12)
+
+    def test_vectorized_scalar_output(self):
+        x0 = np.array([100.0, -0.5])
+        jac_true = self.jac_vector_scalar(x0)
+        jac_diff_2 = approx_derivative(self.fun_vector_scalar_batch, x0,
+                                       method='2-point', vectorized=True)
+        jac_diff_3 = approx_derivative(self.fun_vector_scalar_batch, x0,
+                                       vectorized=True)
+        assert_allclose(jac_diff_2, jac_true, rtol=1e-6)
+        assert_allclose(jac_diff_3, jac_true, rtol=1e-7)
+
+    def test_vectorized_equivalence(self):
+        # With bounds some variables switch to one-sided schemes, which
+        # the vectorized path must reproduce exactly.
+        lb = np.array([1.0, 1.0])
+        ub = np.array([2.0, 2.0])
+        x0 = np.array([1.0, 2.0])
+        for method in ['2-point', '3-point']:
+            jac_loop = approx_derivative(self.fun_vector_vector, x0,
+                                         method=method, bounds=(lb, ub))
+            jac_vec = approx_derivative(self.fun_vector_vector_batch, x0,
+                                        method=method, bounds=(lb, ub),
+                                        vectorized=True)
+            assert_equal(jac_vec, jac_loop)
+
+    def test_vectorized_incompatible_options(self):
+        x0 = np.array([1.0, 2.0])
+        assert_raises(ValueError, approx_derivative,
+                      self.fun_vector_vector_batch, x0, vectorized=True,
+                      as_linear_operator=True)
+        assert_raises(ValueError, approx_derivative,
+                      self.fun_vector_vector_batch, x0, vectorized=True,
+                      sparsity=np.ones((3, 2)))
+
+    def test_workers(self):
+        lb = np.array([1.0, 1.0])
+        ub = np.array([2.0, 2.0])
+        x0 = np.array([1.0, 2.0])
+        for method in ['2-point', '3-point', 'cs']:
+            for bounds in [(-np.inf, np.inf), (lb, ub)]:
+                if method == 'cs' and bounds[0] is lb:
+                    continue
+                jac_serial = approx_derivative(self.fun_vector_vector, x0,
+                                               method=method, bounds=bounds)
+                jac_threads = approx_derivative(self.fun_vector_vector, x0,
+                                                method=method, bounds=bounds,
+                                                workers=2)
+                assert_equal(jac_threads, jac_serial)
+
+    def test_workers_invalid(self):
+        x0 = np.array([1.0, 2.0])
+        assert_raises(ValueError, approx_derivative,
+                      self.fun_vector_vector, x0, workers=0)
+        assert_raises(ValueError, approx_derivative,
+                      self.fun_vector_vector, x0, workers=-2)
+
+    def test_workers_incompatible_options(self):
+        x0 = np.array([1.0, 2.0])
+        assert_raises(ValueError, approx_derivative,
+                      self.fun_vector_vector, x0, workers=2,
+                      as_linear_operator=True)
+        assert_raises(ValueError, approx_derivative,
+                      self.fun_vector_vector, x0, workers=2,
+                      sparsity=np.ones((3, 2)))
+        assert_raises(ValueError, approx_derivative,
+                      self.fun_vector_vector_batch, x0, workers=2,
+                      vectorized=True)
+
     def test_wrong_dimensions(self):
         x0 = 1.0
         assert_raises(RuntimeError, approx_derivative,
@@ -350,6 +440,27 @@ class TestApproxDerivativesDense(object):
         assert_allclose(jac_diff_2, jac_true, rtol=1e-6)
         assert_allclose(jac_diff_3, jac_true, rtol=1e-9)
 
+    def test_non_float_x0(self):
+        # Integer and float32 x0 must be promoted to float64 before
+        # perturbation; the scratch buffers otherwise truncate the steps.
+        def fun(x):
+            return x ** 2
+
+        jac_true = np.diag([2.0, 4.0, 6.0])
+        for x0 in [np.array([1, 2, 3]), np.array([1, 2, 3], np.float32)]:
+            for method in ['2-point', '3-point', 'cs']:
+                jac_diff = approx_derivative(fun, x0, method=method)
+                assert_allclose(jac_diff, jac_true, rtol=1e-6)
+                jac_diff = approx_derivative(fun, x0, method=method,
+                                             workers=2)
+                assert_allclose(jac_diff, jac_true, rtol=1e-6)
+                jac_diff = approx_derivative(fun, x0, method=method,
+                                             vectorized=True)
+                assert_allclose(jac_diff, jac_true, rtol=1e-6)
+                jac_diff = approx_derivative(fun, x0, method=method,
+                                             sparsity=np.identity(3))
+                assert_allclose(jac_diff.toarray(), jac_true, rtol=1e-6)
+
     def test_non_numpy(self):
         x0 = 1.0
         jac_true = self.jac_non_numpy(x0)
@@ -458,6 +569,26 @@ class TestApproxDerivativeSparse(object):
                 self.fun, self.x0, sparsity=(structure, groups), method=method)
             assert_equal(J_dense, J_sparse.toarray())
 
+    def test_estimator_reuse(self):
+        # A preconstructed estimator called at successive points must give
+        # the same results as one-shot approx_derivative calls.
+        A = self.structure(self.n)
+        groups = group_columns(A)
+        for method in ['2-point', '3-point', 'cs']:
+            estimator = _ApproxDerivative(self.fun, method=method,
+                                          bounds=(self.lb, self.ub),
+                                          sparsity=(A, groups))
+            for x0 in [self.x0, 0.9 * self.x0]:
+                J_est = estimator(x0)
+                J_ref = approx_derivative(self.fun, x0, method=method,
+                                          bounds=(self.lb, self.ub),
+                                          sparsity=(A, groups))
+                assert_equal(J_est.toarray(), J_ref.toarray())
+
+        estimator = _ApproxDerivative(self.fun)
+        for x0 in [self.x0, 0.9 * self.x0]:
+            assert_equal(estimator(x0), approx_derivative(self.fun, x0))
+
     def test_check_derivative(self):
         def jac(x):
             return csr_matrix(self.jac(x))